@@ -0,0 +1,150 @@
+import logging
+import subprocess
+import sys
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from .scraper import Scraper
+from .services.task_queue import TaskQueue, open_task_queue
+
+class Coordinator:
+    """
+    Splits a scrape into tasks on a shared TaskQueue and merges the results.
+
+    Flow of a job:
+    - "tile" task per bbox tile: query Overpass and parse the businesses.
+    - "enrich" task per business with a website (if enrich is on).
+    - "summarize" task per business with a website (if summarize is on).
+    Follow-up tasks are added by the workers themselves (see src/worker.py).
+    """
+
+    def __init__(self, queue: TaskQueue, tile_grid: int = 2):
+        self.queue = queue
+        self.tile_grid = tile_grid
+        # Only used for geocoding and tiling; requests go through the shared rate limit
+        self.scraper = Scraper(enrich=False, rate_limiter=queue)
+
+    def submit(self, search_terms: List[str], location: str, enrich: bool = True, summarize: bool = False) -> Optional[str]:
+        logging.info(f"Geocoding location: {location}")
+        loc_data = self.scraper.nominatim.get_lat_lon_bbox(location)
+
+        if not loc_data:
+            logging.error("Location not found.")
+            return None
+
+        bbox = loc_data["boundingbox"] # [s, n, w, e]
+        logging.info(f"Found location: {loc_data['display_name']} (BBox: {bbox})")
+        tiles = self.scraper.build_tiles(bbox, rows=self.tile_grid, cols=self.tile_grid)
+
+        job_id = self.queue.create_job({
+            "terms": search_terms,
+            "location": location,
+            "enrich": enrich,
+            "summarize": summarize,
+        })
+        self.queue.add_tasks(job_id, [
+            {
+                "kind": "tile",
+                "key": str(i),
+                "payload": {"bbox": tile, "terms": search_terms, "enrich": enrich, "summarize": summarize},
+            }
+            for i, tile in enumerate(tiles)
+        ])
+        logging.info(f"Submitted job {job_id} with {len(tiles)} tile tasks.")
+        return job_id
+
+    def wait(self, job_id: str, poll_interval: float = 5.0, workers: Optional[List[subprocess.Popen]] = None):
+        """
+        Blocks until the job has no pending or running tasks.
+        If local worker processes are given and all of them exit first,
+        raises RuntimeError instead of waiting forever.
+        """
+        while self.queue.has_unfinished(job_id):
+            # Check the queue again after the poll, a worker may have just
+            # finished the last task and exited
+            if workers and all(proc.poll() is not None for proc in workers) and self.queue.has_unfinished(job_id):
+                codes = [proc.returncode for proc in workers]
+                raise RuntimeError(f"All local workers exited (exit codes {codes}) before job {job_id} finished")
+
+            counts = self.queue.counts(job_id)
+            logging.info(
+                f"Job {job_id}: {counts['done']} done, {counts['leased']} running, "
+                f"{counts['pending']} pending, {counts['failed']} failed"
+            )
+            time.sleep(poll_interval)
+
+    def collect(self, job_id: str) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Merges task results into one list of businesses, in tile order.
+        Each enrich/summarize result replaces the earlier version of its business.
+        Returns the businesses and the number of failed tasks per stage.
+        """
+        businesses = {}
+        failed = {"tile": 0, "enrich": 0, "summarize": 0}
+        for stage in ("tile", "enrich", "summarize"):
+            for task in self.queue.results(job_id, kind=stage):
+                if task["status"] == "failed":
+                    logging.warning(f"{stage} task {task['key']} failed: {task['error']}")
+                    failed[stage] += 1
+                    continue
+                if task["status"] != "done":
+                    continue
+
+                if stage == "tile":
+                    for b in task["result"]:
+                        # Tiles share their edges, keep the first copy
+                        businesses.setdefault(str(b["osm_id"]), b)
+                else:
+                    businesses[task["key"]] = task["result"]
+
+        results = list(businesses.values())
+        logging.info(f"Total unique businesses found: {len(results)}")
+        return results, failed
+
+def run_distributed(search_terms: List[str], location: str, enrich: bool = True, summarize: bool = False,
+                    queue_url: str = "sqlite:///findplace_queue.db", local_workers: int = 0,
+                    tile_grid: int = 2) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Submits a job, optionally starts local worker processes, waits for the
+    job to finish and returns the merged results, and whether they are
+    complete (False if any task failed or the job did not finish).
+    Other worker processes on the same host can join with `python -m src.worker --queue <url>`.
+    """
+    queue = open_task_queue(queue_url)
+    coordinator = Coordinator(queue, tile_grid=tile_grid)
+    job_id = coordinator.submit(search_terms, location, enrich=enrich, summarize=summarize)
+    if not job_id:
+        # Nothing was submitted (location not found), no results to miss
+        return [], True
+
+    workers = [
+        subprocess.Popen([sys.executable, "-m", "src.worker", "--queue", queue_url, "--job", job_id, "--exit-when-idle"])
+        for _ in range(local_workers)
+    ]
+    if workers:
+        logging.info(f"Started {len(workers)} local workers.")
+
+    try:
+        coordinator.wait(job_id, workers=workers)
+    except RuntimeError as e:
+        logging.error(str(e))
+        return [], False
+    finally:
+        # Interrupted before the job finished: don't leave its tasks for the next run's workers
+        if queue.has_unfinished(job_id):
+            cancelled = queue.cancel_job(job_id)
+            logging.warning(f"Cancelled job {job_id} ({cancelled} unfinished tasks).")
+        for proc in workers:
+            if proc.poll() is None:
+                proc.terminate()
+            proc.wait()
+
+    results, failed = coordinator.collect(job_id)
+    if any(failed.values()):
+        counts = queue.counts(job_id)
+        logging.error(
+            f"Job {job_id} is incomplete: {failed['tile']} tile, {failed['enrich']} enrich and "
+            f"{failed['summarize']} summarize tasks failed ({counts['done']} done, {counts['failed']} failed in total). "
+            f"Businesses of failed tiles are missing from the results."
+        )
+        return results, False
+    return results, True
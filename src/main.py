@@ -4,6 +4,7 @@ import json
 import pandas as pd
 import os
 from src.scraper import Scraper
+from src.coordinator import run_distributed
 from src.utils.map_gen import MapGenerator
 
 def setup_logging():
@@ -12,6 +13,18 @@ def setup_logging():
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return number
+
 def main():
     setup_logging()
     
@@ -19,14 +32,34 @@ def main():
     parser.add_argument("--terms", nargs="+", required=True, help="List of search terms (e.g. cafe restaurant)")
     parser.add_argument("--location", required=True, help="Location name (e.g. 'New York City')")
     parser.add_argument("--enrich", action="store_true", help="Enable website enrichment (crawling)")
+    parser.add_argument("--summarize", action="store_true", help="Generate AI summaries of business websites")
     parser.add_argument("--output", default="output", help="Output directory")
+    parser.add_argument("--distributed", action="store_true", help="Split the scrape into tasks on a shared queue, processed by `python -m src.worker`")
+    parser.add_argument("--queue", default="sqlite:///findplace_queue.db", help="Task queue URL for --distributed")
+    parser.add_argument("--local-workers", type=non_negative_int, default=0, help="Number of worker processes to start locally for --distributed")
+    parser.add_argument("--tile-grid", type=positive_int, default=2, help="Split the area into an N x N grid of tiles for --distributed. Only areas larger than 0.1 square degrees are tiled; smaller ones are a single tile task")
     
     args = parser.parse_args()
     
     print(f"Starting scrape for {args.terms} in {args.location}...")
     
-    scraper = Scraper(enrich=args.enrich)
-    results = scraper.scrape(args.terms, args.location)
+    complete = True
+    if args.distributed:
+        results, complete = run_distributed(
+            args.terms,
+            args.location,
+            enrich=args.enrich,
+            summarize=args.summarize,
+            queue_url=args.queue,
+            local_workers=args.local_workers,
+            tile_grid=args.tile_grid,
+        )
+    else:
+        scraper = Scraper(enrich=args.enrich, summarize=args.summarize)
+        results = scraper.scrape(args.terms, args.location)
+    
+    if not complete:
+        print("WARNING: the distributed scrape did not finish cleanly, results are incomplete (see the log above).")
     
     if not results:
         print("No results found.")
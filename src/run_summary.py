@@ -1,25 +1,360 @@
 import argparse
 import csv
+import hashlib
+import json
 import logging
+import os
+import queue
+import re
 import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from src.services.summarizer import WebsiteSummarizer
 
+URL_CANDIDATES = ["website", "url", "link", "homepage"]
+
 def setup_logging():
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
+def find_url_column(fieldnames: List[str]) -> Optional[str]:
+    # 1. Exact match
+    for col in fieldnames:
+        if col.lower() in URL_CANDIDATES:
+            return col
+
+    # 2. Contains match if no exact match
+    for col in fieldnames:
+        for cand in URL_CANDIDATES:
+            if cand in col.lower():
+                return col
+    return None
+
+def row_key(row: Dict[str, str], fieldnames: List[str]) -> bytes:
+    # Identifies an input row by its original column values, so it can be
+    # matched against rows already written to the output file. Only a digest
+    # is kept, so resuming a large output doesn't hold all its rows in memory.
+    values = [row.get(col) or "" for col in fieldnames]
+    return hashlib.sha1(json.dumps(values).encode('utf-8')).digest()
+
+def key_fields_for(input_fields: List[str]) -> List[str]:
+    # "Summary" is rewritten in the output, so it can't identify a row
+    # (e.g. when re-running an earlier output file as input)
+    return [col for col in input_fields if col != "Summary"]
+
+def load_done_keys(path: str, fieldnames: List[str]) -> Tuple[Counter, Optional[List[str]]]:
+    """
+    Reads an existing output file and counts the keys of the rows it already
+    contains (duplicate input rows are counted separately), together with its header.
+    Returns (Counter(), None) if the file does not exist or is empty.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return Counter(), None
+
+    drop_partial_row(path)
+    if os.path.getsize(path) == 0:
+        return Counter(), None
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        done = Counter(row_key(row, fieldnames) for row in reader)
+        return done, list(reader.fieldnames or [])
+
+def drop_partial_row(path: str):
+    # Rows are flushed one at a time, so a crash can only leave the last row
+    # half written. Truncate the file after the last complete row before
+    # appending to it.
+    with open(path, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b'\n':
+            return
+
+        # A newline inside a quoted field (even number of quotes so far) is not
+        # a row end; "" escapes flip the state twice, so counting quotes works.
+        f.seek(0)
+        in_quotes = False
+        end = 0
+        offset = 0
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            for m in re.finditer(b'["\n]', chunk):
+                if m.group() == b'"':
+                    in_quotes = not in_quotes
+                elif not in_quotes:
+                    end = offset + m.end()
+            offset += len(chunk)
+
+        logging.warning(f"Dropping incomplete last row of {path}.")
+        f.truncate(end)
+
+class StreamingSummaryRunner:
+    """
+    Summarizes rows as a pipeline instead of one at a time:
+    rows are read lazily, pages are fetched by a thread pool, the fetched text
+    is summarized in batches by a single inference thread, and finished rows
+    are written (and flushed) as soon as they are ready.
+    """
+    SENTINEL = None
+
+    def __init__(self, summarizer: WebsiteSummarizer, url_col: str, fetch_workers: int = 8,
+                 batch_size: int = 8, batch_timeout: float = 0.5, ordered: bool = True,
+                 max_pending: Optional[int] = None):
+        self.summarizer = summarizer
+        self.url_col = url_col
+        self.fetch_workers = fetch_workers
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.ordered = ordered
+        # Bounds the number of rows held in memory at once (fetching, waiting
+        # for inference or waiting for an earlier row to be written).
+        self.max_pending = max_pending or max(fetch_workers, batch_size) * 4
+
+        self.text_queue = queue.Queue()
+        self.done_queue = queue.Queue()
+        self.pending = threading.Semaphore(self.max_pending)
+        self.written = 0
+        # Set by the inference or writer thread if it dies, so the other
+        # threads and the main loop stop instead of waiting forever
+        self.failed = threading.Event()
+        self.error = None
+
+    def _fail(self, where: str, e: Exception):
+        logging.error(f"{where} failed: {e}")
+        self.error = f"{where} failed: {e}"
+        self.failed.set()
+
+    def _fetch(self, idx: int, row: Dict[str, str]):
+        url = row.get(self.url_col)
+        try:
+            text = self.summarizer.fetch_text(url)
+            fallback = self.summarizer.check_text(text)
+        except Exception as e:
+            logging.error(f"Failed to fetch {url}: {e}")
+            text, fallback = None, "Failed to content"
+
+        if fallback is not None:
+            row["Summary"] = fallback
+            self.done_queue.put((idx, row))
+        else:
+            self.text_queue.put((idx, row, text))
+
+    def _flush_batch(self, batch: List[Tuple[int, Dict[str, str], str]]):
+        summaries = self.summarizer.summarize_texts([text for _, _, text in batch])
+        for (idx, row, _), summary in zip(batch, summaries):
+            row["Summary"] = summary
+            self.done_queue.put((idx, row))
+
+    def _inference_loop(self):
+        try:
+            self._run_inference()
+        except Exception as e:
+            self._fail("Summarization", e)
+
+    def _run_inference(self):
+        batch = []
+        while not self.failed.is_set():
+            try:
+                item = self.text_queue.get(timeout=self.batch_timeout)
+            except queue.Empty:
+                # Nothing new arrived for a while, don't hold a partial batch
+                if batch:
+                    self._flush_batch(batch)
+                    batch = []
+                continue
+
+            if item is self.SENTINEL:
+                break
+
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._flush_batch(batch)
+                batch = []
+
+        if self.failed.is_set():
+            return
+        if batch:
+            self._flush_batch(batch)
+        self.done_queue.put(self.SENTINEL)
+
+    def _write_row(self, writer, f, row: Dict[str, str]):
+        writer.writerow(row)
+        f.flush()
+        self.written += 1
+        self.pending.release()
+        if self.written % 100 == 0:
+            logging.info(f"Written {self.written} rows.")
+
+    def _writer_loop(self, writer, f):
+        try:
+            self._run_writer(writer, f)
+        except Exception as e:
+            self._fail("Writing output", e)
+
+    def _run_writer(self, writer, f):
+        buffered = {}
+        next_idx = 0
+        while not self.failed.is_set():
+            try:
+                item = self.done_queue.get(timeout=self.batch_timeout)
+            except queue.Empty:
+                continue
+            if item is self.SENTINEL:
+                break
+
+            idx, row = item
+            if not self.ordered:
+                self._write_row(writer, f, row)
+                continue
+
+            # Hold rows that finished early until every row before them is written
+            buffered[idx] = row
+            while next_idx in buffered:
+                self._write_row(writer, f, buffered.pop(next_idx))
+                next_idx += 1
+
+        if self.failed.is_set():
+            return
+
+        # Only reached if rows were lost upstream; write what is left rather than drop it
+        for idx in sorted(buffered):
+            self._write_row(writer, f, buffered[idx])
+
+    def _wait_for_slot(self, threads: List[threading.Thread]) -> bool:
+        # Returns False if a worker thread died, so no slot will ever free up
+        while not self.pending.acquire(timeout=self.batch_timeout):
+            if self.failed.is_set():
+                return False
+            if not all(t.is_alive() for t in threads):
+                self.error = self.error or "A worker thread exited unexpectedly"
+                self.failed.set()
+                return False
+        return True
+
+    def run(self, reader, writer, f, skip_keys: Counter, key_fields: List[str]) -> int:
+        """
+        Processes every row from reader and writes it to writer.
+        Rows whose key is counted in skip_keys are not processed or written
+        again; each skip uses up one count, so duplicate rows are kept.
+        Returns the number of rows written.
+        Raises RuntimeError if the inference or writer thread fails.
+        """
+        inference_thread = threading.Thread(target=self._inference_loop, daemon=True)
+        writer_thread = threading.Thread(target=self._writer_loop, args=(writer, f), daemon=True)
+        inference_thread.start()
+        writer_thread.start()
+
+        idx = 0
+        skipped = 0
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as pool:
+            for i, row in enumerate(reader):
+                if skip_keys:
+                    key = row_key(row, key_fields)
+                    if skip_keys[key] > 0:
+                        skip_keys[key] -= 1
+                        skipped += 1
+                        continue
+
+                if not self._wait_for_slot([inference_thread, writer_thread]):
+                    break
+                url = row.get(self.url_col)
+                if url and url.startswith("http"):
+                    pool.submit(self._fetch, idx, row)
+                else:
+                    logging.warning(f"Skipping row {i+1}: Invalid URL '{url}'")
+                    row["Summary"] = ""
+                    self.done_queue.put((idx, row))
+                idx += 1
+
+        # All fetches are done, so nothing else will be added to the text queue
+        self.text_queue.put(self.SENTINEL)
+        inference_thread.join()
+        writer_thread.join()
+
+        if self.failed.is_set():
+            raise RuntimeError(f"{self.error} ({self.written} rows written before stopping)")
+
+        if skipped:
+            logging.info(f"Skipped {skipped} rows already present in the output.")
+        return self.written
+
+def run_streaming(args, summarizer: WebsiteSummarizer):
+    try:
+        with open(args.input, 'r', newline='', encoding='utf-8') as f_in:
+            sample = f_in.read(1024)
+            f_in.seek(0)
+            if not csv.Sniffer().has_header(sample):
+                logging.error("Input CSV must have a header row.")
+                return
+
+            reader = csv.DictReader(f_in)
+            input_fields = list(reader.fieldnames) if reader.fieldnames else []
+            url_col = find_url_column(input_fields)
+            if not url_col:
+                logging.error(f"Could not find a URL column (looked for {URL_CANDIDATES}). Please rename the column in your CSV.")
+                return
+            logging.info(f"Using '{url_col}' as the URL source.")
+
+            fieldnames = list(input_fields)
+            if "Summary" not in fieldnames:
+                fieldnames.append("Summary")
+
+            key_fields = key_fields_for(input_fields)
+            skip_keys, existing_fields = Counter(), None
+            if args.resume:
+                skip_keys, existing_fields = load_done_keys(args.output, key_fields)
+                if existing_fields is not None:
+                    if existing_fields != fieldnames:
+                        logging.error(f"Existing output {args.output} has different columns, cannot resume.")
+                        return
+                    logging.info(f"Resuming: {sum(skip_keys.values())} rows already in {args.output}.")
+
+            mode = 'a' if existing_fields is not None else 'w'
+            with open(args.output, mode, newline='', encoding='utf-8') as f_out:
+                writer = csv.DictWriter(f_out, fieldnames=fieldnames)
+                if mode == 'w':
+                    writer.writeheader()
+                    f_out.flush()
+
+                runner = StreamingSummaryRunner(
+                    summarizer,
+                    url_col,
+                    fetch_workers=args.workers,
+                    batch_size=args.batch_size,
+                    ordered=not args.unordered,
+                )
+                written = runner.run(reader, writer, f_out, skip_keys, key_fields)
+
+        logging.info(f"Saved {written} new rows to {args.output}")
+    except Exception as e:
+        logging.error(f"Error during streaming summary: {e}")
+
 def main():
     setup_logging()
     
     parser = argparse.ArgumentParser(description="Generate AI summaries from a list of URLs")
     parser.add_argument("--input", required=True, help="Input file containing URLs (CSV)")
     parser.add_argument("--output", required=True, help="Output CSV file")
+    parser.add_argument("--stream", action="store_true", help="Read rows lazily, fetch and summarize concurrently, and write rows as they finish")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent page fetches in streaming mode")
+    parser.add_argument("--batch-size", type=int, default=8, help="Number of texts summarized per model call in streaming mode")
+    parser.add_argument("--unordered", action="store_true", help="In streaming mode, write rows as soon as they finish instead of in input order")
+    parser.add_argument("--resume", action="store_true", help="In streaming mode, skip rows already present in the output file and append the rest")
     
     args = parser.parse_args()
     
     summarizer = WebsiteSummarizer()
+
+    if args.resume or args.unordered:
+        args.stream = True
+    if args.stream:
+        run_streaming(args, summarizer)
+        return
+    
     processed_rows = []
     fieldnames = []
     
@@ -35,26 +370,10 @@ def main():
                 fieldnames = list(reader.fieldnames) if reader.fieldnames else []
                 
                 # Find the URL column
-                url_col = None
-                candidates = ["website", "url", "link", "homepage"]
-                
-                # 1. Exact match
-                for col in fieldnames:
-                    if col.lower() in candidates:
-                        url_col = col
-                        break
-                
-                # 2. Contains match if no exact match
-                if not url_col:
-                    for col in fieldnames:
-                        for cand in candidates:
-                            if cand in col.lower():
-                                url_col = col
-                                break
-                        if url_col: break
+                url_col = find_url_column(fieldnames)
                 
                 if not url_col:
-                    logging.error(f"Could not find a URL column (looked for {candidates}). Please rename the column in your CSV.")
+                    logging.error(f"Could not find a URL column (looked for {URL_CANDIDATES}). Please rename the column in your CSV.")
                     return
 
                 logging.info(f"Using '{url_col}' as the URL source.")
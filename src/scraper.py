@@ -1,6 +1,6 @@
 import logging
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from .services.nominatim import NominatimService
 from .services.overpass import OverpassService
 from .services.enricher import EnrichmentService
@@ -8,9 +8,9 @@ from .services.summarizer import WebsiteSummarizer
 from .utils.geo import GeoUtils
 
 class Scraper:
-    def __init__(self, enrich: bool = True, summarize: bool = False):
-        self.nominatim = NominatimService()
-        self.overpass = OverpassService()
+    def __init__(self, enrich: bool = True, summarize: bool = False, rate_limiter=None):
+        self.nominatim = NominatimService(rate_limiter=rate_limiter)
+        self.overpass = OverpassService(rate_limiter=rate_limiter)
         self.enricher = EnrichmentService()
         self.summarizer = WebsiteSummarizer() if summarize else None
         self.should_enrich = enrich
@@ -27,27 +27,8 @@ class Scraper:
         bbox = loc_data["boundingbox"] # [s, n, w, e]
         logging.info(f"Found location: {loc_data['display_name']} (BBox: {bbox})")
         
-        # Check if tiling is needed
-        tiles = [bbox]
-        if GeoUtils.is_bbox_too_large(bbox, max_sq_degrees=0.1): # Strict tiling
-            logging.info("Area too large, tiling...")
-            # Simple 2x2 split for now, could be recursive
-            tiles = GeoUtils.split_bbox(bbox, rows=2, cols=2)
-            logging.info(f"Split into {len(tiles)} tiles.")
-
-        # Prepare tags
-        # Map search terms to broad OSM keys
-        # For simplicity, we assume search_terms are values for "amenity", "shop", "office"
-        # Ideally, we allow user to specify "amenity=cafe"
-        # But per requirements: "categoryMap"
-        # We'll just search common keys for the values
-        query_tags = {
-            "amenity": search_terms,
-            "shop": search_terms,
-            "office": search_terms,
-            "tourism": search_terms,
-            "leisure": search_terms
-        }
+        tiles = self.build_tiles(bbox)
+        query_tags = self.build_query_tags(search_terms)
         
         all_results = []
         seen_ids = set()
@@ -63,37 +44,9 @@ class Scraper:
                     continue
                     
                 seen_ids.add(el_id)
-                # Parse
-                tags = el.get("tags", {})
-                name = tags.get("name")
-                if not name:
-                    continue # Skip unnamed
-                
-                lat = el.get("lat")
-                lon = el.get("lon")
-                
-                # Handling 'way' elements (they have center due to 'out center')
-                if not lat and "center" in el:
-                    lat = el["center"].get("lat")
-                    lon = el["center"].get("lon")
-                
-                business = {
-                    "osm_id": el_id,
-                    "name": name,
-                    "lat": lat,
-                    "lon": lon,
-                    "type": el.get("type"),
-                    "tags": tags, # Keep raw tags
-                    
-                    # Normalized fields
-                    "phone": tags.get("phone") or tags.get("contact:phone"),
-                    "website": tags.get("website") or tags.get("contact:website"),
-                    "address_city": tags.get("addr:city"),
-                    "address_street": tags.get("addr:street"),
-                    "category": self._determine_category(tags, search_terms)
-                }
-                
-                all_results.append(business)
+                business = self.parse_element(el, search_terms)
+                if business:
+                    all_results.append(business)
 
         logging.info(f"Total unique businesses found: {len(all_results)}")
         
@@ -115,6 +68,63 @@ class Scraper:
                 
         return all_results
 
+    def build_tiles(self, bbox: List[float], rows: int = 2, cols: int = 2) -> List[List[float]]:
+        # Check if tiling is needed
+        tiles = [bbox]
+        if GeoUtils.is_bbox_too_large(bbox, max_sq_degrees=0.1): # Strict tiling
+            logging.info("Area too large, tiling...")
+            # Simple rows x cols grid (2x2 by default), could be recursive
+            tiles = GeoUtils.split_bbox(bbox, rows=rows, cols=cols)
+            logging.info(f"Split into {len(tiles)} tiles.")
+        return tiles
+
+    def build_query_tags(self, search_terms: List[str]) -> Dict[str, List[str]]:
+        # Prepare tags
+        # Map search terms to broad OSM keys
+        # For simplicity, we assume search_terms are values for "amenity", "shop", "office"
+        # Ideally, we allow user to specify "amenity=cafe"
+        # But per requirements: "categoryMap"
+        # We'll just search common keys for the values
+        return {
+            "amenity": search_terms,
+            "shop": search_terms,
+            "office": search_terms,
+            "tourism": search_terms,
+            "leisure": search_terms
+        }
+
+    def parse_element(self, el: Dict[str, Any], search_terms: List[str]) -> Optional[Dict[str, Any]]:
+        # Parse
+        tags = el.get("tags", {})
+        name = tags.get("name")
+        if not name:
+            return None # Skip unnamed
+
+        lat = el.get("lat")
+        lon = el.get("lon")
+
+        # Handling 'way' elements (they have center due to 'out center')
+        if not lat and "center" in el:
+            lat = el["center"].get("lat")
+            lon = el["center"].get("lon")
+
+        business = {
+            "osm_id": el.get("id"),
+            "name": name,
+            "lat": lat,
+            "lon": lon,
+            "type": el.get("type"),
+            "tags": tags, # Keep raw tags
+
+            # Normalized fields
+            "phone": tags.get("phone") or tags.get("contact:phone"),
+            "website": tags.get("website") or tags.get("contact:website"),
+            "address_city": tags.get("addr:city"),
+            "address_street": tags.get("addr:street"),
+            "category": self._determine_category(tags, search_terms)
+        }
+        return business
+
     def _determine_category(self, tags: Dict[str, str], search_terms: List[str]) -> str:
         # Match back to search term
         for k, v in tags.items():
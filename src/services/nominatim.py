@@ -5,12 +5,17 @@ from typing import Optional, List, Dict, Any
 class NominatimService:
     BASE_URL = "https://nominatim.openstreetmap.org/search"
     
-    def __init__(self, user_agent: str = "FindPlace/1.0 (dev_test_app_v1@generic.com)"):
+    def __init__(self, user_agent: str = "FindPlace/1.0 (dev_test_app_v1@generic.com)", rate_limiter=None):
         self.headers = {"User-Agent": user_agent}
+        # If set, the 1 req/sec policy is enforced across processes by it
+        self.rate_limiter = rate_limiter
         self.last_request_time = 0
         self.min_delay = 1.1  # OSM Policy: Max 1 req/sec
 
     def _wait_for_rate_limit(self):
+        if self.rate_limiter:
+            self.rate_limiter.wait_for_rate_limit("nominatim", self.min_delay)
+            return
         elapsed = time.time() - self.last_request_time
         if elapsed < self.min_delay:
             time.sleep(self.min_delay - elapsed)
@@ -1,16 +1,34 @@
 import requests
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+class OverpassBusyError(Exception):
+    """
+    Overpass answered 429 (too many requests) or 504 (server overloaded).
+    retry_after holds the Retry-After header in seconds, if it was sent.
+    """
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"Overpass busy (HTTP {status_code})")
+        self.status_code = status_code
+        self.retry_after = retry_after
 
 class OverpassService:
     BASE_URL = "https://overpass-api.de/api/interpreter"
     
-    def __init__(self, user_agent: str = "FindPlace/1.0 (dev_test_app_v1@generic.com)"):
+    def __init__(self, user_agent: str = "FindPlace/1.0 (dev_test_app_v1@generic.com)", rate_limiter=None):
         self.headers = {"User-Agent": user_agent}
+        # Optional shared limiter (e.g. the distributed task queue) so that
+        # several processes respect one global rate limit.
+        self.rate_limiter = rate_limiter
         # Overpass has limits, but mainly query complexity. 
         # We put a small delay to be safe.
         self.last_request_time = 0 
         self.min_delay = 2.0
+        # Client side timeout, a bit above the [timeout:60] of the query itself
+        self.request_timeout = 90
+        # Overpass limits concurrent queries per IP; with a shared rate_limiter
+        # this applies across all processes
+        self.max_concurrent = 1
 
     def _wait_for_rate_limit(self):
         elapsed = time.time() - self.last_request_time
@@ -56,15 +74,41 @@ class OverpassService:
         """
         return query
 
-    def fetch_data(self, bbox: List[float], tags: Dict[str, List[str]]) -> List[Dict[str, Any]]:
-        self._wait_for_rate_limit()
+    def _acquire_slot(self) -> Optional[str]:
+        if not self.rate_limiter:
+            self._wait_for_rate_limit()
+            return None
+        # Hold the shared slot for the whole request, not just its start
+        return self.rate_limiter.acquire_rate_limit(
+            "overpass",
+            self.min_delay,
+            max_concurrent=self.max_concurrent,
+            hold_seconds=self.request_timeout + 30,
+        )
+
+    def _release_slot(self, token: Optional[str]):
+        if token:
+            self.rate_limiter.release_rate_limit("overpass", token)
+
+    def fetch_data(self, bbox: List[float], tags: Dict[str, List[str]], raise_errors: bool = False) -> List[Dict[str, Any]]:
         query = self.build_query(bbox, tags)
+        token = self._acquire_slot()
         
         try:
-            response = requests.post(self.BASE_URL, data={"data": query}, headers=self.headers)
+            response = requests.post(self.BASE_URL, data={"data": query}, headers=self.headers, timeout=self.request_timeout)
+            if response.status_code in (429, 504):
+                retry_after = response.headers.get("Retry-After")
+                raise OverpassBusyError(
+                    response.status_code,
+                    float(retry_after) if retry_after and retry_after.isdigit() else None
+                )
             response.raise_for_status()
             data = response.json()
             return data.get("elements", [])
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error fetching Overpass data: {e}")
             return []
+        finally:
+            self._release_slot(token)
@@ -3,6 +3,7 @@ import requests
 from bs4 import BeautifulSoup
 from transformers import pipeline
 import torch
+from typing import List, Optional
 
 class WebsiteSummarizer:
     def __init__(self, model_name="facebook/bart-large-cnn"):
@@ -50,14 +51,26 @@ class WebsiteSummarizer:
             self.logger.error(f"Failed to fetch {url}: {e}")
             return None
 
-    def summarize_url(self, url: str) -> str:
-        text = self.fetch_text(url)
+    def check_text(self, text: Optional[str]) -> Optional[str]:
+        """
+        Returns a placeholder summary if the text cannot be summarized,
+        or None if it should be sent to the model.
+        """
         if not text:
             return "Failed to content"
         
         # Check if text is too short
         if len(text.split()) < 50:
             return f"Content too short to summarize: {text[:200]}..."
+        return None
+
+    def summarize_texts(self, texts: List[str]) -> List[str]:
+        """
+        Summarizes several texts in one pipeline call.
+        Returns one summary (or error string) per input text.
+        """
+        if not texts:
+            return []
 
         self._load_model()
         
@@ -65,14 +78,26 @@ class WebsiteSummarizer:
             # Truncate text to avoiding token limit issues (simple char limit for now)
             # BART model max position embeddings is usually 1024 tokens.
             # ~4000 chars is a safe upper bound for input.
-            input_text = text[:4000] 
+            inputs = [text[:4000] for text in texts]
             
-            self.logger.info(f"Summarizing {len(input_text)} characters...")
-            summary = self.summarizer(input_text, max_length=130, min_length=30, do_sample=False)
+            self.logger.info(f"Summarizing {len(inputs)} text(s), {sum(len(t) for t in inputs)} characters...")
+            summaries = self.summarizer(inputs, max_length=130, min_length=30, do_sample=False, batch_size=len(inputs))
             
-            result = summary[0]['summary_text']
+            results = [summary['summary_text'] for summary in summaries]
             self.logger.info("Summary generated.")
-            return result
+            return results
         except Exception as e:
+            if len(texts) > 1:
+                # Retry one by one so a single bad input doesn't fail the whole batch
+                self.logger.warning(f"Batch summarization failed ({e}), retrying texts one by one.")
+                return [self.summarize_texts([text])[0] for text in texts]
             self.logger.error(f"Summarization failed: {e}")
-            return f"Summarization error: {str(e)}"
+            return [f"Summarization error: {str(e)}"]
+
+    def summarize_url(self, url: str) -> str:
+        text = self.fetch_text(url)
+        fallback = self.check_text(text)
+        if fallback is not None:
+            return fallback
+        
+        return self.summarize_texts([text])[0]
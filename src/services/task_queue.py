@@ -0,0 +1,423 @@
+import json
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any
+
+class TaskQueue(ABC):
+    """
+    Durable work queue used by the distributed mode (see src/coordinator.py
+    and src/worker.py).
+
+    A job is split into tasks of a given kind ("tile", "enrich", "summarize").
+    Workers lease a task for a limited time, then complete it (optionally
+    adding follow-up tasks) or fail it. Tasks whose lease expires or that fail
+    are retried until max_attempts is reached.
+
+    The queue also provides global rate limiting, so that every worker shares
+    the same Overpass/Nominatim budget.
+
+    SQLiteTaskQueue (single host) is the only backend for now; another server
+    (e.g. Redis, to spread workers over several machines)
+    can be plugged in by implementing every abstract method and registering
+    it in open_task_queue().
+    """
+
+    @abstractmethod
+    def create_job(self, params: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_tasks(self, job_id: str, tasks: List[Dict[str, Any]]) -> int:
+        """
+        tasks: list of {"kind": str, "key": str, "payload": dict}.
+        A task with the same (job_id, kind, key) as an existing one is ignored.
+        Returns the number of tasks added.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float = 300.0, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns the next available task (with "id", "job_id", "kind", "key",
+        "payload", "attempts") leased to worker_id, or None if there is none.
+        If job_id is given, only tasks of that job are leased.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def extend_lease(self, task_id: int, worker_id: str, lease_seconds: float = 300.0) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, task_id: int, worker_id: str, result: Any, children: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """
+        Stores the result of a leased task and adds its follow-up tasks.
+        Returns False if the lease was lost (the task then belongs to another worker).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail(self, task_id: int, worker_id: str, error: str, retry_delay: float = 5.0) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def defer(self, task_id: int, worker_id: str, delay: float, reason: str) -> bool:
+        """
+        Puts a leased task back to run after delay seconds without using up
+        an attempt (e.g. the upstream API asked us to slow down).
+        Returns False if the lease was lost.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def cancel_job(self, job_id: str) -> int:
+        """
+        Cancels every pending or leased task of a job, so workers stop picking
+        it up. Results of running tasks are dropped. Returns the number of
+        cancelled tasks.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def counts(self, job_id: str) -> Dict[str, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def has_unfinished(self, job_id: Optional[str] = None) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def results(self, job_id: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def wait_for_rate_limit(self, name: str, min_delay: float):
+        raise NotImplementedError
+
+    @abstractmethod
+    def acquire_rate_limit(self, name: str, min_delay: float, max_concurrent: int = 1, hold_seconds: float = 120.0) -> str:
+        """
+        Blocks until a request to the named service may start: at most
+        max_concurrent requests held at once, started at least min_delay apart.
+        Returns a token to pass to release_rate_limit() once the request is
+        done. A hold expires after hold_seconds in case its process dies.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def release_rate_limit(self, name: str, token: str):
+        raise NotImplementedError
+
+class SQLiteTaskQueue(TaskQueue):
+    """
+    TaskQueue stored in a single SQLite file, for worker processes on a single
+    host only. WAL mode needs shared memory between the processes, so the file
+    must not be shared over a network filesystem, and lease times and rate
+    limit slots are stored as absolute time.time() values from one clock.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        params TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        available_at REAL NOT NULL,
+        leased_until REAL,
+        worker_id TEXT,
+        result TEXT,
+        error TEXT,
+        UNIQUE (job_id, kind, key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, available_at);
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        name TEXT PRIMARY KEY,
+        next_allowed REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS rate_limit_holds (
+        token TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    """
+
+    # How often a request waiting for a free concurrency slot checks again
+    RATE_LIMIT_POLL = 0.5
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            # WAL lets workers read while another one holds the write lock
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call, so the queue can be used from
+        # several threads (e.g. a worker and its lease heartbeat).
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock up front, so two workers can never
+            # lease the same task.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _insert_tasks(self, conn, job_id: str, tasks: List[Dict[str, Any]]) -> int:
+        now = time.time()
+        added = 0
+        for task in tasks:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO tasks (job_id, kind, key, payload, max_attempts, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, task["kind"], str(task["key"]), json.dumps(task["payload"]), self.max_attempts, now)
+            )
+            added += cursor.rowcount
+        return added
+
+    def create_job(self, params: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, params, created_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(params), time.time())
+            )
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT params FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row["params"]) if row else None
+
+    def add_tasks(self, job_id: str, tasks: List[Dict[str, Any]]) -> int:
+        with self._transaction() as conn:
+            return self._insert_tasks(conn, job_id, tasks)
+
+    def lease(self, worker_id: str, lease_seconds: float = 300.0, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        job_filter = " AND job_id = ?" if job_id else ""
+        job_params = (job_id,) if job_id else ()
+        with self._transaction() as conn:
+            # Expired leases that used up their attempts will not be retried
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'Lease expired', worker_id = NULL "
+                "WHERE status = 'leased' AND leased_until < ? AND attempts >= max_attempts",
+                (now,)
+            )
+            row = conn.execute(
+                "SELECT id, job_id, kind, key, payload, attempts FROM tasks "
+                "WHERE ((status = 'pending' AND available_at <= ?) "
+                "OR (status = 'leased' AND leased_until < ?))" + job_filter +
+                " ORDER BY id LIMIT 1",
+                (now, now) + job_params
+            ).fetchone()
+            if not row:
+                return None
+
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', attempts = attempts + 1, worker_id = ?, leased_until = ? "
+                "WHERE id = ?",
+                (worker_id, now + lease_seconds, row["id"])
+            )
+
+        return {
+            "id": row["id"],
+            "job_id": row["job_id"],
+            "kind": row["kind"],
+            "key": row["key"],
+            "payload": json.loads(row["payload"]),
+            "attempts": row["attempts"] + 1,
+        }
+
+    def extend_lease(self, task_id: int, worker_id: str, lease_seconds: float = 300.0) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET leased_until = ? WHERE id = ? AND status = 'leased' AND worker_id = ?",
+                (time.time() + lease_seconds, task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker_id: str, result: Any, children: Optional[List[Dict[str, Any]]] = None) -> bool:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT job_id FROM tasks WHERE id = ? AND status = 'leased' AND worker_id = ?",
+                (task_id, worker_id)
+            ).fetchone()
+            if not row:
+                return False
+
+            conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL, leased_until = NULL WHERE id = ?",
+                (json.dumps(result), task_id)
+            )
+            # Added in the same transaction, so a crash can't lose follow-up work
+            if children:
+                self._insert_tasks(conn, row["job_id"], children)
+            return True
+
+    def fail(self, task_id: int, worker_id: str, error: str, retry_delay: float = 5.0) -> bool:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM tasks WHERE id = ? AND status = 'leased' AND worker_id = ?",
+                (task_id, worker_id)
+            ).fetchone()
+            if not row:
+                return False
+
+            if row["attempts"] >= row["max_attempts"]:
+                conn.execute(
+                    "UPDATE tasks SET status = 'failed', error = ?, leased_until = NULL WHERE id = ?",
+                    (error, task_id)
+                )
+            else:
+                # Back off a little more on every attempt
+                conn.execute(
+                    "UPDATE tasks SET status = 'pending', error = ?, worker_id = NULL, leased_until = NULL, "
+                    "available_at = ? WHERE id = ?",
+                    (error, time.time() + retry_delay * row["attempts"], task_id)
+                )
+            return True
+
+    def defer(self, task_id: int, worker_id: str, delay: float, reason: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'pending', attempts = attempts - 1, error = ?, worker_id = NULL, "
+                "leased_until = NULL, available_at = ? WHERE id = ? AND status = 'leased' AND worker_id = ?",
+                (reason, time.time() + delay, task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def cancel_job(self, job_id: str) -> int:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'cancelled', worker_id = NULL, leased_until = NULL "
+                "WHERE job_id = ? AND status IN ('pending', 'leased')",
+                (job_id,)
+            )
+            return cursor.rowcount
+
+    def counts(self, job_id: str) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM tasks WHERE job_id = ? GROUP BY status",
+                (job_id,)
+            ).fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0, "cancelled": 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def has_unfinished(self, job_id: Optional[str] = None) -> bool:
+        query = "SELECT 1 FROM tasks WHERE status IN ('pending', 'leased')"
+        params = ()
+        if job_id:
+            query += " AND job_id = ?"
+            params = (job_id,)
+        with self._connect() as conn:
+            return conn.execute(query + " LIMIT 1", params).fetchone() is not None
+
+    def results(self, job_id: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT kind, key, status, result, error FROM tasks WHERE job_id = ?"
+        params = [job_id]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY id", params).fetchall()
+        return [
+            {
+                "kind": row["kind"],
+                "key": row["key"],
+                "status": row["status"],
+                "result": json.loads(row["result"]) if row["result"] is not None else None,
+                "error": row["error"],
+            }
+            for row in rows
+        ]
+
+    def wait_for_rate_limit(self, name: str, min_delay: float):
+        # Reserve the next free slot for this service, then sleep until it.
+        # Slots are handed out under the write lock, so requests from all
+        # processes end up at least min_delay apart.
+        with self._transaction() as conn:
+            now = time.time()
+            row = conn.execute("SELECT next_allowed FROM rate_limits WHERE name = ?", (name,)).fetchone()
+            slot = max(now, row["next_allowed"]) if row else now
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, next_allowed) VALUES (?, ?)",
+                (name, slot + min_delay)
+            )
+        if slot > now:
+            time.sleep(slot - now)
+
+    def acquire_rate_limit(self, name: str, min_delay: float, max_concurrent: int = 1, hold_seconds: float = 120.0) -> str:
+        token = uuid.uuid4().hex
+        while True:
+            with self._transaction() as conn:
+                now = time.time()
+                conn.execute("DELETE FROM rate_limit_holds WHERE name = ? AND expires_at < ?", (name, now))
+                held = conn.execute(
+                    "SELECT COUNT(*) AS n FROM rate_limit_holds WHERE name = ?", (name,)
+                ).fetchone()["n"]
+                row = conn.execute("SELECT next_allowed FROM rate_limits WHERE name = ?", (name,)).fetchone()
+                next_allowed = row["next_allowed"] if row else 0
+
+                if held < max_concurrent and now >= next_allowed:
+                    conn.execute(
+                        "INSERT INTO rate_limit_holds (token, name, expires_at) VALUES (?, ?, ?)",
+                        (token, name, now + hold_seconds)
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO rate_limits (name, next_allowed) VALUES (?, ?)",
+                        (name, now + min_delay)
+                    )
+                    return token
+
+            # Sleep outside the transaction so other processes can release their slot
+            if held < max_concurrent:
+                time.sleep(next_allowed - now)
+            else:
+                time.sleep(self.RATE_LIMIT_POLL)
+
+    def release_rate_limit(self, name: str, token: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM rate_limit_holds WHERE token = ? AND name = ?", (token, name))
+
+def open_task_queue(url: str, max_attempts: int = 3) -> TaskQueue:
+    """
+    Opens a queue from a URL, e.g. "sqlite:///findplace_queue.db".
+    A plain file path is treated as a SQLite database.
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteTaskQueue(url[len("sqlite:///"):], max_attempts=max_attempts)
+    if "://" not in url:
+        return SQLiteTaskQueue(url, max_attempts=max_attempts)
+    raise ValueError(f"Unsupported task queue URL: {url} (only sqlite:/// is available)")
@@ -0,0 +1,169 @@
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from src.scraper import Scraper
+from src.services.overpass import OverpassBusyError
+from src.services.summarizer import WebsiteSummarizer
+from src.services.task_queue import TaskQueue, open_task_queue
+
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+class Worker:
+    """
+    Pulls tasks submitted by the Coordinator (src/coordinator.py) from a
+    shared TaskQueue and runs them. Any number of workers can share a queue.
+    """
+
+    def __init__(self, queue: TaskQueue, worker_id: Optional[str] = None,
+                 lease_seconds: float = 300.0, poll_interval: float = 2.0,
+                 job_id: Optional[str] = None, max_task_seconds: float = 1800.0):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        # Only work on this job if set, otherwise on any job in the queue
+        self.job_id = job_id
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        # Wait at least this long before retrying a tile Overpass refused (429/504)
+        self.busy_retry_delay = 60.0
+        # The heartbeat stops extending a task's lease after this long, so a
+        # hung task is eventually retried by another worker
+        self.max_task_seconds = max_task_seconds
+        self.scraper = Scraper(enrich=True, rate_limiter=queue)
+        # Created on the first summarize task, the model is only loaded then
+        self.summarizer = None
+        self.handlers = {
+            "tile": self.handle_tile,
+            "enrich": self.handle_enrich,
+            "summarize": self.handle_summarize,
+        }
+
+    def _next_tasks(self, business: Dict[str, Any], enrich: bool, summarize: bool) -> List[Dict[str, Any]]:
+        if not business.get("website"):
+            return []
+        key = str(business["osm_id"])
+        if enrich:
+            return [{"kind": "enrich", "key": key, "payload": {"business": business, "summarize": summarize}}]
+        if summarize:
+            return [{"kind": "summarize", "key": key, "payload": {"business": business}}]
+        return []
+
+    def handle_tile(self, payload: Dict[str, Any]) -> Tuple[Any, List[Dict[str, Any]]]:
+        terms = payload["terms"]
+        query_tags = self.scraper.build_query_tags(terms)
+        # Raise instead of returning [] so the tile is retried
+        elements = self.scraper.overpass.fetch_data(payload["bbox"], query_tags, raise_errors=True)
+        logging.info(f"Got {len(elements)} elements from tile.")
+
+        businesses = []
+        children = []
+        seen_ids = set()
+        for el in elements:
+            el_id = el.get("id")
+            if el_id in seen_ids:
+                continue
+
+            seen_ids.add(el_id)
+            business = self.scraper.parse_element(el, terms)
+            if not business:
+                continue
+
+            if payload["summarize"] and not business.get("website"):
+                business["summary"] = "No website found"
+            businesses.append(business)
+            children.extend(self._next_tasks(business, payload["enrich"], payload["summarize"]))
+
+        return businesses, children
+
+    def handle_enrich(self, payload: Dict[str, Any]) -> Tuple[Any, List[Dict[str, Any]]]:
+        business = self.scraper.enricher.enrich_business(payload["business"])
+        return business, self._next_tasks(business, False, payload["summarize"])
+
+    def handle_summarize(self, payload: Dict[str, Any]) -> Tuple[Any, List[Dict[str, Any]]]:
+        if not self.summarizer:
+            self.summarizer = WebsiteSummarizer()
+        business = payload["business"]
+        logging.info(f"Summarizing {business['website']}...")
+        business["summary"] = self.summarizer.summarize_url(business["website"])
+        return business, []
+
+    def _heartbeat(self, task_id: int, stop: threading.Event):
+        # Keep the lease alive while a long task (e.g. summarization) runs
+        started = time.time()
+        while not stop.wait(self.lease_seconds / 3):
+            if time.time() - started > self.max_task_seconds:
+                logging.warning(f"Task {task_id} is running for over {self.max_task_seconds:.0f}s, no longer extending its lease.")
+                return
+            if not self.queue.extend_lease(task_id, self.worker_id, self.lease_seconds):
+                logging.warning(f"Lost lease on task {task_id}.")
+                return
+
+    def process(self, task: Dict[str, Any]):
+        logging.info(f"Running {task['kind']} task {task['key']} of job {task['job_id']} (attempt {task['attempts']})")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task["id"], stop), daemon=True)
+        heartbeat.start()
+        try:
+            handler = self.handlers.get(task["kind"])
+            if not handler:
+                raise ValueError(f"Unknown task kind: {task['kind']}")
+            result, children = handler(task["payload"])
+        except OverpassBusyError as e:
+            # Not the task's fault: retry later without using up an attempt
+            delay = max(e.retry_after or 0, self.busy_retry_delay)
+            logging.warning(f"Task {task['id']}: {e}, retrying in {delay:.0f}s.")
+            self.queue.defer(task["id"], self.worker_id, delay, str(e))
+            return
+        except Exception as e:
+            logging.error(f"Task {task['id']} failed: {e}")
+            self.queue.fail(task["id"], self.worker_id, str(e))
+            return
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if not self.queue.complete(task["id"], self.worker_id, result, children):
+            logging.warning(f"Lost lease on task {task['id']} (cancelled or taken over by another worker), result dropped.")
+
+    def run(self, exit_when_idle: bool = False):
+        logging.info(f"Worker {self.worker_id} started.")
+        while True:
+            task = self.queue.lease(self.worker_id, self.lease_seconds, job_id=self.job_id)
+            if task:
+                self.process(task)
+                continue
+
+            if exit_when_idle and not self.queue.has_unfinished(self.job_id):
+                logging.info("No work left, exiting.")
+                return
+            time.sleep(self.poll_interval)
+
+def main():
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Worker for distributed scraping")
+    parser.add_argument("--queue", default="sqlite:///findplace_queue.db", help="Task queue URL (e.g. sqlite:///findplace_queue.db)")
+    parser.add_argument("--worker-id", help="Worker name (default: hostname-pid)")
+    parser.add_argument("--lease-seconds", type=float, default=300.0, help="How long a task stays reserved without a heartbeat")
+    parser.add_argument("--max-task-seconds", type=float, default=1800.0, help="Stop extending the lease of a task running longer than this, so another worker can retry it")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when no task is available")
+    parser.add_argument("--job", help="Only process tasks of this job id")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Exit once the queue (or --job) has no pending or running tasks")
+
+    args = parser.parse_args()
+
+    queue = open_task_queue(args.queue)
+    worker = Worker(queue, worker_id=args.worker_id, lease_seconds=args.lease_seconds,
+                    poll_interval=args.poll_interval, job_id=args.job,
+                    max_task_seconds=args.max_task_seconds)
+    worker.run(exit_when_idle=args.exit_when_idle)
+
+if __name__ == "__main__":
+    main()